@@ -5,24 +5,51 @@ Following the proven blueprint with function calling
 """
 
 import asyncio
-import base64
-import json
 import os
 import sys
 import ssl
-from flask import Flask, request, Response
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect, WebSocketState
+import uvicorn
+import websockets
 from twilio.twiml.voice_response import VoiceResponse
+from xml.sax.saxutils import escape
 from dotenv import load_dotenv
-import threading
 import time
 from datetime import datetime
 import logging
 import requests
-from collections import defaultdict
 import weakref
-import gc
+import contextlib
 from functools import lru_cache
+from collections import OrderedDict, deque
+import gc
 import time
+import orjson
+import msgspec
+import numpy as np
+
+# pybase64 is a SIMD-accelerated drop-in for the stdlib base64 functions,
+# and can encode straight to str (media frames must be text)
+try:
+    from pybase64 import b64decode, b64encode_as_string
+except ImportError:
+    # Call binascii directly; the stdlib base64 functions are thin wrappers over it
+    from binascii import a2b_base64, b2a_base64
+    
+    def b64decode(data, validate=False):
+        return a2b_base64(data)
+        
+    def b64encode_as_string(data):
+        return b2a_base64(data, newline=False).decode("ascii")
+
+# uvloop is a faster drop-in event loop; it is not available on Windows
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Load environment variables
 load_dotenv()
@@ -34,8 +61,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Flask app for Twilio webhooks
-app = Flask(__name__)
+# Health checks and metrics scrapes would otherwise dominate the access log
+QUIET_ACCESS_PATHS = frozenset(('/', '/metrics'))
+
+class QuietAccessFilter(logging.Filter):
+    def filter(self, record):
+        # uvicorn.access args: (client_addr, method, full_path, http_version, status_code)
+        args = record.args
+        if isinstance(args, tuple) and len(args) >= 3:
+            return args[2].partition('?')[0] not in QUIET_ACCESS_PATHS
+        return True
+
+logging.getLogger('uvicorn.access').addFilter(QuietAccessFilter())
 
 # Function calling support
 def get_drug_info(drug_name):
@@ -98,58 +135,118 @@ def create_function_call_response(function_name, result):
         "result": result
     }
 
-# Optimized connection storage with automatic cleanup
+# Per-call state shared by the handler tasks of one Twilio stream
+class Connection:
+    __slots__ = ('twilio_ws', 'deepgram_ws', 'stream_sid', 'media_prefix', 'clear_message',
+                 'started', 'last_activity', '__weakref__')
+    
+    def __init__(self, twilio_ws, deepgram_ws):
+        self.twilio_ws = twilio_ws
+        self.deepgram_ws = deepgram_ws
+        self.stream_sid = None  # Set by handle_twilio_messages on 'start'
+        self.media_prefix = None
+        self.clear_message = None
+        self.started = asyncio.Event()  # Set once stream_sid is known
+        self.last_activity = time.monotonic()  # Last Twilio audio, for expiry
+        
+    def start_stream(self, stream_sid):
+        """Record the Twilio stream and precompute its outbound event envelopes"""
+        self.stream_sid = stream_sid
+        # Outbound media frames are just media_prefix + base64 payload + MEDIA_SUFFIX
+        self.media_prefix = (
+            '{"event":"media","streamSid":' + orjson.dumps(stream_sid).decode()
+            + ',"media":{"payload":"'
+        )
+        self.clear_message = orjson.dumps({"event": "clear", "streamSid": stream_sid}).decode()
+        self.started.set()
+
+# Closes the payload string, media object and event opened by media_prefix
+MEDIA_SUFFIX = '"}}'
+
+# Typed shape of the Twilio media stream events we read. msgspec decodes
+# straight into these structs and skips every field not declared here.
+class TwilioMedia(msgspec.Struct):
+    payload: str
+    track: str = "inbound"
+
+class TwilioStart(msgspec.Struct):
+    streamSid: str
+
+class TwilioMessage(msgspec.Struct):
+    event: str
+    media: TwilioMedia | None = None
+    start: TwilioStart | None = None
+
+twilio_decoder = msgspec.json.Decoder(TwilioMessage)
+
+# Optimized connection storage with lazy expiry. Handlers hold their
+# Connection directly; this weak registry feeds metrics and closes calls
+# that stop sending audio.
+CONNECTION_SHARDS = 16  # Power of two; a connection's shard is hash(conn) & (CONNECTION_SHARDS - 1)
+
+CONNECTION_REAP_INTERVAL = 60  # Seconds between sweeps when nothing else touches the registry
+
 class ConnectionManager:
+    # Seconds without Twilio audio before a call is treated as hung and closed
+    max_age = int(os.getenv('CONNECTION_MAX_IDLE', 300))
+    
     def __init__(self):
-        self._connections = {}
-        self._lock = threading.Lock()
-        self._cleanup_timer = None
+        # Everything runs on the event loop thread, so no locks. Sharding keeps
+        # the sweep in add_connection to one small set.
+        self._shards = [weakref.WeakSet() for _ in range(CONNECTION_SHARDS)]
         
-    def add_connection(self, stream_sid, connection_data):
-        with self._lock:
-            self._connections[stream_sid] = {
-                **connection_data,
-                'created_at': time.time(),
-                'last_activity': time.time()
-            }
-        logger.info(f"➕ Added connection {stream_sid}")
+    def _shard(self, connection):
+        # Not id(): objects are 16-byte aligned, so its low bits are always zero.
+        # The default hash is id() rotated right by 4 bits.
+        return self._shards[hash(connection) & (CONNECTION_SHARDS - 1)]
         
-    def get_connection(self, stream_sid):
-        with self._lock:
-            conn = self._connections.get(stream_sid)
-            if conn:
-                conn['last_activity'] = time.time()
-            return conn
-            
-    def remove_connection(self, stream_sid):
-        with self._lock:
-            if stream_sid in self._connections:
-                del self._connections[stream_sid]
-                logger.info(f"➖ Removed connection {stream_sid}")
-                
-    def cleanup_inactive(self, max_age=300):  # 5 minutes
-        current_time = time.time()
-        to_remove = []
+    def _expire(self, connections, now):
+        """Drop and close stale connections in one shard"""
+        stale = [conn for conn in connections if now - conn.last_activity > self.max_age]
+        if stale:
+            for conn in stale:
+                connections.discard(conn)
+                # Usually a missed Twilio 'stop'. Dropping the Deepgram socket ends
+                # the call's TaskGroup, and its handler then cleans up as usual.
+                conn.deepgram_ws.transport.close()
+            logger.info(f"🧹 Closed {len(stale)} inactive connections")
         
-        with self._lock:
-            for stream_sid, conn in self._connections.items():
-                if current_time - conn['last_activity'] > max_age:
-                    to_remove.append(stream_sid)
-                    
-        for stream_sid in to_remove:
-            self.remove_connection(stream_sid)
-            logger.info(f"🧹 Cleaned up inactive connection {stream_sid}")
+    def add_connection(self, connection):
+        connections = self._shard(connection)
+        self._expire(connections, time.monotonic())
+        connections.add(connection)
+        logger.info("➕ Added connection")
             
+    def remove_connection(self, connection):
+        connections = self._shard(connection)
+        if connection in connections:
+            connections.discard(connection)
+            logger.info(f"➖ Removed connection {connection.stream_sid}")
+                
     def get_active_count(self):
-        with self._lock:
-            return len(self._connections)
+        now = time.monotonic()
+        total = 0
+        for connections in self._shards:
+            self._expire(connections, now)
+            total += len(connections)
+        return total
+            
+    async def reap(self):
+        """Expire stale connections periodically, even with no calls or probes"""
+        while True:
+            await asyncio.sleep(CONNECTION_REAP_INTERVAL)
+            self.get_active_count()
             
     def get_connection_info(self):
-        with self._lock:
-            return {
-                'total': len(self._connections),
-                'streams': list(self._connections.keys())
-            }
+        now = time.monotonic()
+        streams = []
+        for connections in self._shards:
+            self._expire(connections, now)
+            streams.extend(conn.stream_sid for conn in connections)
+        return {
+            'total': len(streams),
+            'streams': streams
+        }
 
 # Global connection manager
 connection_manager = ConnectionManager()
@@ -158,58 +255,193 @@ connection_manager = ConnectionManager()
 AUDIO_BUFFER_SIZE = 160  # 20ms at 8kHz
 MAX_BUFFER_SIZE = 3200   # 400ms max buffer
 
+# Fixed-capacity buffer batching inbound Twilio audio before it goes to Deepgram.
+# Preallocated once per call; reads advance a start offset, and the unread
+# tail is only moved to the front when a write would run past the end.
+class AudioBuffer:
+    __slots__ = ('_buffer', '_view', '_start', '_end')
+    
+    def __init__(self, capacity):
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        
+    def __len__(self):
+        return self._end - self._start
+        
+    def write(self, chunk):
+        capacity = len(self._buffer)
+        if len(chunk) > capacity:
+            chunk = chunk[-capacity:]
+        overflow = len(self) + len(chunk) - capacity
+        if overflow > 0:
+            # Full: drop the oldest audio rather than grow
+            self._start += overflow
+        if self._end + len(chunk) > capacity:
+            # Compact: slide unread bytes back to offset 0
+            length = self._end - self._start
+            self._view[:length] = self._view[self._start:self._end]
+            self._start, self._end = 0, length
+        end = self._end + len(chunk)
+        self._view[self._end:end] = chunk
+        self._end = end
+        
+    def read(self, size):
+        """Remove and return the oldest size bytes"""
+        start = self._start
+        self._start = start + size
+        data = bytes(self._view[start:self._start])
+        if self._start == self._end:
+            self._start = self._end = 0
+        return data
+
+# Outbound (Deepgram -> Twilio) audio batching
+OUTBOUND_FLUSH_INTERVAL = 0.02  # 20ms coalescing window
+OUTBOUND_MAX_BATCH = 10         # Max Deepgram chunks per Twilio media event
+OUTBOUND_MAX_BATCH_BYTES = 640  # Stop adding chunks once a batch holds 80ms of mulaw
+INBOUND_QUEUE_SIZE = 64         # Max messages waiting for the Deepgram writer; oldest dropped beyond this
+OUTBOUND_QUEUE_SIZE = 500       # Deepgram chunks waiting for Twilio; a full reply fits, beyond it the reader waits
+OUTBOUND_IDLE_GAP = 0.1         # After this long without sending, flush the first chunk at once
+OUTBOUND_FRAME_BYTES = AUDIO_BUFFER_SIZE  # Media payloads are cut to whole 20ms mulaw frames
+
+# Inbound (Twilio -> Deepgram) batches start small and double up to the full
+# buffer, so the first words of an utterance reach Deepgram quickly
+INBOUND_START_SIZE = 2 * AUDIO_BUFFER_SIZE  # 40ms
+INBOUND_MAX_FRAME_BYTES = 4 * MAX_BUFFER_SIZE  # Cap on backed-up audio merged into one send
+
+# Inbound silence suppression. mulaw encodes silence as 0xFF/0x7F, so the
+# magnitude of a sample is (byte ^ 0xFF) & 0x7F.
+SILENCE_THRESHOLD = 16   # Mean mulaw magnitude below this counts as silence
+SILENCE_HOLDOFF = 5      # Silent buffers (~2s at full size) forwarded before audio is withheld
+KEEP_ALIVE_INTERVAL = 5  # Seconds between Deepgram KeepAlives while withholding
+
+# WebSocket tuning for the Deepgram client. The uvicorn server for Twilio only
+# takes max_size (as ws_max_size) and disables deflate; its sansio backend has
+# no read_limit, write_limit or max_queue. mulaw frames are tiny and
+# incompressible, so permessage-deflate is pure overhead.
+WEBSOCKET_OPTIONS = {
+    'compression': None,
+    'max_size': 2**16,      # 64KB max message
+    'read_limit': 2**17,    # 128KB read buffer
+    'write_limit': 2**17,   # 128KB write buffer high-water mark
+    'max_queue': 8,         # Bound unread messages for backpressure
+}
+
+# Deepgram sends TTS audio in bulk and in chunks of its own choosing, so its
+# client gets a looser message cap and a bigger read buffer than Twilio's
+# 20ms frames need
+DEEPGRAM_WEBSOCKET_OPTIONS = {
+    **WEBSOCKET_OPTIONS,
+    'max_size': 2**20,      # 1MB max message
+    'read_limit': 2**20,    # 1MB read buffer
+}
+
+# Deepgram endpoint and credentials, resolved once at import
+DEEPGRAM_URL = "wss://agent.deepgram.com/agent"
+DEEPGRAM_API_KEY = os.getenv('DEEPGRAM_API_KEY')
+DEEPGRAM_SUBPROTOCOLS = ("token", DEEPGRAM_API_KEY)
+
+# Warm Deepgram sessions kept connected ahead of incoming calls. Opt-in: an
+# idle pool still reconnects every ~20s to stay fresh, around the clock
+DEEPGRAM_POOL_SIZE = int(os.getenv('DEEPGRAM_POOL_SIZE', 0))
+# Seconds a warm session may wait before it is replaced. A conservative bound
+# for a session that has not had Settings yet, not a documented Deepgram limit
+DEEPGRAM_POOL_MAX_IDLE = int(os.getenv('DEEPGRAM_POOL_MAX_IDLE', 30))
+DEEPGRAM_POOL_REFRESH_INTERVAL = 5  # Seconds between pool sweeps that rotate ageing sessions
+DEEPGRAM_CONNECT_ATTEMPTS = 4  # On-demand connects per call, backing off 0.5s, 1s, 2s
+
 # Rate limiting
+RATE_LIMIT_SHARDS = 16  # Power of two; a key's shard is hash(key) & (RATE_LIMIT_SHARDS - 1)
+RATE_LIMIT_MAX_KEYS = 50000  # Clients tracked at once; least recently seen are evicted first
+
 class RateLimiter:
     def __init__(self, max_requests=100, window=60):
         self.max_requests = max_requests
         self.window = window
-        self.requests = defaultdict(list)
+        # key -> (window index, count this window, count last window), split
+        # across shards kept in least-recently-seen order. Only the event loop
+        # thread calls in, so no locks; each shard is swept separately.
+        self._shards = [OrderedDict() for _ in range(RATE_LIMIT_SHARDS)]
+        self._shard_max_keys = RATE_LIMIT_MAX_KEYS // RATE_LIMIT_SHARDS
+        self._swept = [0] * RATE_LIMIT_SHARDS  # Window index each shard was last swept in
         
     def is_allowed(self, key):
-        now = time.time()
-        # Clean old requests
-        self.requests[key] = [req for req in self.requests[key] if now - req < self.window]
-        
-        if len(self.requests[key]) >= self.max_requests:
-            return False
+        # Sliding window counter: last window's count, weighted by how much of
+        # it still overlaps the trailing window, plus this window's count
+        window, elapsed = divmod(time.monotonic(), self.window)
+        window = int(window)
+        shard = hash(key) & (RATE_LIMIT_SHARDS - 1)
+        buckets = self._shards[shard]
+        if self._swept[shard] != window:
+            # First request in this shard since the window rolled over:
+            # drop keys with no requests in this or the last window
+            expired = [old for old, state in buckets.items() if state[0] < window - 1]
+            for old in expired:
+                del buckets[old]
+            self._swept[shard] = window
             
-        self.requests[key].append(now)
+        state = buckets.get(key)
+        if state is not None:
+            buckets.move_to_end(key)
+        elif len(buckets) >= self._shard_max_keys:
+            buckets.popitem(last=False)
+            
+        if state is None or state[0] < window - 1:
+            current = previous = 0
+        elif state[0] == window:
+            current, previous = state[1], state[2]
+        else:
+            current, previous = 0, state[1]
+            
+        if previous * (1 - elapsed / self.window) + current >= self.max_requests:
+            buckets[key] = (window, current, previous)
+            return False
+        buckets[key] = (window, current + 1, previous)
         return True
+        
+    def get_active_count(self):
+        return sum(len(buckets) for buckets in self._shards)
+        
+    def get_total_requests(self):
+        """Requests counted in the current window across all clients"""
+        window = int(time.monotonic() // self.window)
+        return sum(
+            state[1] for buckets in self._shards for state in buckets.values()
+            if state[0] == window
+        )
 
 rate_limiter = RateLimiter()
 
-# Cached configurations
-@lru_cache(maxsize=1)
-def get_deepgram_config():
-    """Get cached Deepgram configuration with function calling"""
-    return {
-        "type": "Settings",
-        "audio": {
-            "input": {
-                "encoding": "mulaw",
-                "sample_rate": 8000,
-            },
-            "output": {
-                "encoding": "mulaw", 
-                "sample_rate": 8000,
-                "container": "none",
-            },
+# Deepgram Voice Agent configuration with function calling
+DEEPGRAM_CONFIG = {
+    "type": "Settings",
+    "audio": {
+        "input": {
+            "encoding": "mulaw",
+            "sample_rate": 8000,
         },
-        "agent": {
-            "language": "en",
-            "listen": {
-                "provider": {
-                    "type": "deepgram",
-                    "model": "aura-2-odysseus-en",
-                }
+        "output": {
+            "encoding": "mulaw", 
+            "sample_rate": 8000,
+            "container": "none",
+        },
+    },
+    "agent": {
+        "language": "en",
+        "listen": {
+            "provider": {
+                "type": "deepgram",
+                "model": "aura-2-odysseus-en",
+            }
+        },
+        "think": {
+            "provider": {
+                "type": "open_ai",
+                "model": "gpt-4o-mini",
+                "temperature": 0.7,
             },
-            "think": {
-                "provider": {
-                    "type": "open_ai",
-                    "model": "gpt-4o-mini",
-                    "temperature": 0.7,
-                },
-                "prompt": """You are a helpful pharmacy assistant integrated into a phone system.
+            "prompt": """You are a helpful pharmacy assistant integrated into a phone system.
 
 Guidelines:
 - Be concise and conversational since this is a voice interaction
@@ -225,138 +457,273 @@ You can help with:
 - General pharmacy questions
 
 Current user is calling via phone."""
+        },
+        "speak": {
+            "provider": {
+                "type": "deepgram",
+                "model": "aura-2-odysseus-en",
+                "voice": "nova",
             },
-            "speak": {
-                "provider": {
-                    "type": "deepgram",
-                    "model": "aura-2-odysseus-en",
-                    "voice": "nova",
-                },
+        },
+        "greeting": "Hello! I'm your pharmacy assistant. How can I help you today?",
+        "functions": [
+            {
+                "name": "get_drug_info",
+                "description": "Get information about a specific drug",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "drug_name": {
+                            "type": "string",
+                            "description": "The name of the drug to look up"
+                        }
+                    },
+                    "required": ["drug_name"]
+                }
             },
-            "greeting": "Hello! I'm your pharmacy assistant. How can I help you today?",
-            "functions": [
-                {
-                    "name": "get_drug_info",
-                    "description": "Get information about a specific drug",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "drug_name": {
-                                "type": "string",
-                                "description": "The name of the drug to look up"
-                            }
-                        },
-                        "required": ["drug_name"]
-                    }
-                },
-                {
-                    "name": "place_order",
-                    "description": "Place a pharmacy order",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "customer_name": {
-                                "type": "string",
-                                "description": "The customer's name"
-                            },
-                            "drug_name": {
-                                "type": "string",
-                                "description": "The name of the drug to order"
-                            },
-                            "quantity": {
-                                "type": "integer",
-                                "description": "Quantity to order",
-                                "default": 1
-                            }
+            {
+                "name": "place_order",
+                "description": "Place a pharmacy order",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "customer_name": {
+                            "type": "string",
+                            "description": "The customer's name"
                         },
-                        "required": ["customer_name", "drug_name"]
-                    }
-                },
-                {
-                    "name": "lookup_order",
-                    "description": "Look up the status of an existing order",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "order_id": {
-                                "type": "string",
-                                "description": "The order ID to look up"
-                            }
+                        "drug_name": {
+                            "type": "string",
+                            "description": "The name of the drug to order"
                         },
-                        "required": ["order_id"]
-                    }
+                        "quantity": {
+                            "type": "integer",
+                            "description": "Quantity to order",
+                            "default": 1
+                        }
+                    },
+                    "required": ["customer_name", "drug_name"]
                 }
-            ]
-        },
-    }
+            },
+            {
+                "name": "lookup_order",
+                "description": "Look up the status of an existing order",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "order_id": {
+                            "type": "string",
+                            "description": "The order ID to look up"
+                        }
+                    },
+                    "required": ["order_id"]
+                }
+            }
+        ]
+    },
+}
+
+# Static Deepgram messages serialized once at import. Kept as str because they
+# must go out as text frames (Deepgram treats binary frames as audio).
+DEEPGRAM_SETTINGS_MESSAGE = orjson.dumps(DEEPGRAM_CONFIG).decode()
+KEEP_ALIVE_MESSAGE = orjson.dumps({"type": "KeepAlive"}).decode()
 
 def create_deepgram_connection():
     """Create WebSocket connection to Deepgram Voice Agent with retry logic"""
-    api_key = os.getenv('DEEPGRAM_API_KEY')
-    if not api_key:
+    if not DEEPGRAM_API_KEY:
         raise ValueError("DEEPGRAM_API_KEY environment variable is not set")
     
-    import websockets
-    
     # Connection with timeout and retry
     return websockets.connect(
-        "wss://agent.deepgram.com/agent",
-        subprotocols=["token", api_key],
+        DEEPGRAM_URL,
+        subprotocols=DEEPGRAM_SUBPROTOCOLS,
         ping_interval=20,
         ping_timeout=10,
-        close_timeout=5
+        close_timeout=5,
+        **DEEPGRAM_WEBSOCKET_OPTIONS
     )
 
-@app.route('/', methods=['GET'])
-def health_check():
-    """Health check endpoint with detailed metrics"""
-    try:
-        # Check environment variables
-        env_status = {
-            'deepgram_api_key': bool(os.getenv('DEEPGRAM_API_KEY')),
-            'openai_api_key': bool(os.getenv('OPENAI_API_KEY')),
-            'twilio_account_sid': bool(os.getenv('TWILIO_ACCOUNT_SID')),
-            'twilio_auth_token': bool(os.getenv('TWILIO_AUTH_TOKEN')),
-            'twilio_phone_number': bool(os.getenv('TWILIO_PHONE_NUMBER'))
-        }
+def put_drop_oldest(queue, item):
+    """Enqueue without blocking, discarding the oldest item when full"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+def is_silent(audio):
+    """Check whether a mulaw buffer is (near) silence"""
+    samples = np.frombuffer(audio, dtype=np.uint8)
+    return np.mean((samples ^ 0xFF) & 0x7F) < SILENCE_THRESHOLD
+
+_iso_cache = [0, '']  # [epoch second, its ISO string]
+
+def iso_now():
+    """Current local time as an ISO string, formatted at most once per second"""
+    now = int(time.time())
+    if now != _iso_cache[0]:
+        _iso_cache[0] = now
+        _iso_cache[1] = datetime.fromtimestamp(now).isoformat()
+    return _iso_cache[1]
+
+# Pre-connected Deepgram sessions, so a new call skips the TLS and websocket
+# handshakes. Sessions are single-use: Settings is sent at checkout and the
+# socket is closed when the call ends, with a fresh one opened to replace it.
+# Idle sessions get no Settings or KeepAlive, so a maintenance task rotates
+# them before they reach DEEPGRAM_POOL_MAX_IDLE.
+class DeepgramPool:
+    def __init__(self, size):
+        self.size = size
+        self._idle = deque()  # (opened_at, websocket), oldest first
+        self._fill_task = None
+        self._maintain_task = None
+        self._closing = set()
         
-        # Get connection info
-        conn_info = connection_manager.get_connection_info()
+    async def _open(self):
+        # No socket tuning needed: asyncio and uvloop set TCP_NODELAY on every
+        # TCP transport, this client's included
+        return await create_deepgram_connection()
         
-        return {
-            'status': 'healthy',
-            'message': 'Deepgram Voice Agent Server is running!',
-            'timestamp': datetime.now().isoformat(),
-            'endpoints': {
-                'health': '/ (GET)',
-                'voice': '/voice (POST)', 
-                'media': '/media (POST)',
-                'metrics': '/metrics (GET)',
-                'websocket': 'wss://twilio-deepgram-openai-voice.onrender.com/twilio'
-            },
-            'connections': conn_info,
-            'environment': env_status,
-            'rate_limiting': {
-                'active_requests': len(rate_limiter.requests)
-            },
-            'functions': list(FUNCTION_MAP.keys())
+    async def _fill(self):
+        while len(self._idle) < self.size:
+            try:
+                ws = await self._open()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not pre-connect to Deepgram: {e}")
+                return
+            self._idle.append((time.monotonic(), ws))
+            
+    def _discard(self, ws):
+        task = asyncio.create_task(ws.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+        
+    def refill(self):
+        """Top the pool back up in the background"""
+        if self.size and (self._fill_task is None or self._fill_task.done()):
+            self._fill_task = asyncio.create_task(self._fill())
+            
+    async def _maintain(self):
+        """Replace warm sessions that closed or could go stale before the next sweep"""
+        while True:
+            await asyncio.sleep(DEEPGRAM_POOL_REFRESH_INTERVAL)
+            # A full interval of margin, so checkout never sees an expired session
+            cutoff = time.monotonic() - (DEEPGRAM_POOL_MAX_IDLE - 2 * DEEPGRAM_POOL_REFRESH_INTERVAL)
+            for entry in [entry for entry in self._idle if entry[0] < cutoff or not entry[1].open]:
+                self._idle.remove(entry)
+                self._discard(entry[1])
+            self.refill()
+            
+    def start(self):
+        """Warm the pool and keep it fresh until close()"""
+        if self.size:
+            self.refill()
+            self._maintain_task = asyncio.create_task(self._maintain())
+            
+    async def _open_with_backoff(self):
+        delay = 0.5
+        for attempt in range(1, DEEPGRAM_CONNECT_ATTEMPTS + 1):
+            try:
+                return await self._open()
+            except (OSError, asyncio.TimeoutError, websockets.InvalidHandshake) as e:
+                # A 4xx (e.g. a rejected API key) fails the same way on every attempt
+                rejected = isinstance(e, websockets.InvalidStatusCode) and e.status_code < 500
+                if rejected or attempt == DEEPGRAM_CONNECT_ATTEMPTS:
+                    raise
+                logger.warning(f"⚠️ Deepgram connect failed ({e}), retrying in {delay}s")
+                # Never time.sleep here: it would stall every call on the loop
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 8)
+                
+    async def acquire(self):
+        """Return an open Deepgram session, preferring a warm one"""
+        now = time.monotonic()
+        try:
+            while self._idle:
+                opened_at, ws = self._idle.popleft()
+                if ws.open and now - opened_at < DEEPGRAM_POOL_MAX_IDLE:
+                    return ws
+                self._discard(ws)
+            return await self._open_with_backoff()
+        finally:
+            self.refill()
+            
+    async def close(self):
+        for task in (self._maintain_task, self._fill_task):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        while self._idle:
+            await self._idle.popleft()[1].close()
+
+deepgram_pool = DeepgramPool(DEEPGRAM_POOL_SIZE)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Warm the Deepgram pool and start the reaper; stop both on shutdown"""
+    deepgram_pool.start()
+    reaper = asyncio.create_task(connection_manager.reap())
+    yield
+    reaper.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await reaper
+    await deepgram_pool.close()
+
+# JSONResponse that serializes with orjson instead of the stdlib json module
+class ORJSONResponse(JSONResponse):
+    def render(self, content):
+        return orjson.dumps(content)
+
+# Which credentials are configured; the environment is fixed for the process
+ENV_STATUS = {
+    'deepgram_api_key': bool(DEEPGRAM_API_KEY),
+    'openai_api_key': bool(os.getenv('OPENAI_API_KEY')),
+    'twilio_account_sid': bool(os.getenv('TWILIO_ACCOUNT_SID')),
+    'twilio_auth_token': bool(os.getenv('TWILIO_AUTH_TOKEN')),
+    'twilio_phone_number': bool(os.getenv('TWILIO_PHONE_NUMBER'))
+}
+
+# Static health response built once at import; health_check copies it and
+# fills in the None fields, keeping this key order
+HEALTH_RESPONSE = {
+    'status': 'healthy',
+    'message': 'Deepgram Voice Agent Server is running!',
+    'timestamp': None,
+    'endpoints': {
+        'health': '/ (GET)',
+        'voice': '/voice (POST)', 
+        'metrics': '/metrics (GET)',
+        'websocket': 'wss://twilio-deepgram-openai-voice.onrender.com/twilio'
+    },
+    'connections': None,
+    'environment': ENV_STATUS,
+    'rate_limiting': None,
+    'functions': list(FUNCTION_MAP.keys())
+}
+
+async def health_check(request):
+    """Health check endpoint with detailed metrics"""
+    try:
+        response = HEALTH_RESPONSE.copy()
+        response['timestamp'] = iso_now()
+        response['connections'] = connection_manager.get_connection_info()
+        response['rate_limiting'] = {
+            'active_requests': rate_limiter.get_active_count()
         }
+        return ORJSONResponse(response)
     except Exception as e:
         logger.error(f"❌ Health check error: {e}")
-        return {
+        return ORJSONResponse({
             'status': 'unhealthy',
             'error': str(e),
-            'timestamp': datetime.now().isoformat()
-        }, 500
+            'timestamp': iso_now()
+        }, status_code=500)
 
-@app.route('/metrics', methods=['GET'])
-def metrics():
+async def metrics(request):
     """Detailed metrics endpoint"""
-    return {
+    return ORJSONResponse({
         'connections': connection_manager.get_connection_info(),
         'rate_limiting': {
-            'active_requests': len(rate_limiter.requests),
-            'total_requests': sum(len(reqs) for reqs in rate_limiter.requests.values())
+            'active_requests': rate_limiter.get_active_count(),
+            'total_requests': rate_limiter.get_total_requests()
         },
         'memory': {
             'gc_stats': gc.get_stats(),
@@ -366,255 +733,395 @@ def metrics():
             'available': list(FUNCTION_MAP.keys()),
             'total': len(FUNCTION_MAP)
         }
-    }
+    })
 
-@app.route('/voice', methods=['GET', 'POST'])
-def voice_webhook():
+def say_twiml(text):
+    """Build TwiML that speaks text"""
+    response = VoiceResponse()
+    response.say(text)
+    return str(response)
+
+# Static TwiML, rendered once at import
+TWIML_RATE_LIMITED = say_twiml("Sorry, too many requests. Please try again later.")
+TWIML_TEST = say_twiml("Hello! This is a test response.")
+TWIML_ERROR = say_twiml("Sorry, there was an error. Please try again.")
+# Same markup VoiceResponse produces for connect().stream(...); only the url varies
+TWIML_STREAM_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8"?><Response><Connect>'
+    '<Stream name="voice_agent_stream" track="inbound_track" url="{url}" />'
+    '</Connect></Response>'
+)
+
+def stream_url(host):
+    """Websocket URL Twilio should stream a call to"""
+    # Use wss:// in production (Render or any non-local host)
+    if 'onrender.com' in host or 'localhost' not in host:
+        return f'wss://{host}/twilio'
+    return f'ws://{host}/twilio'
+
+@lru_cache(maxsize=64)
+def stream_twiml(websocket_url):
+    """Render the stream TwiML for a URL; Twilio keeps calling from the same few hosts"""
+    # The host header is client-supplied, so escape it for the attribute
+    return TWIML_STREAM_TEMPLATE.format(url=escape(websocket_url, {'"': '&quot;'}))
+
+async def voice_webhook(request):
     """Twilio voice webhook - returns TwiML to start WebSocket connection"""
     # Rate limiting
-    client_ip = request.remote_addr
+    client_ip = request.client.host if request.client else 'unknown'
     if not rate_limiter.is_allowed(client_ip):
         logger.warning(f"🚫 Rate limit exceeded for {client_ip}")
-        response = VoiceResponse()
-        response.say("Sorry, too many requests. Please try again later.")
-        return Response(str(response), mimetype='text/xml')
+        return Response(TWIML_RATE_LIMITED, media_type='text/xml')
     
     logger.info(f"📞 Voice webhook called with method: {request.method}")
     
     if request.method == 'GET':
         logger.info("📞 GET request to /voice - returning basic TwiML")
-        response = VoiceResponse()
-        response.say("Hello! This is a test response.")
-        return Response(str(response), mimetype='text/xml')
+        return Response(TWIML_TEST, media_type='text/xml')
     
     # Handle POST request (actual call)
-    caller = request.form.get('From', 'Unknown')
+    form = await request.form()
+    caller = form.get('From', 'Unknown')
     logger.info(f"📞 Incoming call from: {caller}")
     
     try:
-        response = VoiceResponse()
+        websocket_url = stream_url(request.headers.get('host', 'localhost:5000'))
+        logger.debug("🔌 WebSocket URL: %s", websocket_url)
         
         # Use Connect for WebSocket streaming (following video approach)
-        connect = response.connect()
-        
-        # Get the host from request headers and ensure HTTPS
-        host = request.headers.get('Host', 'localhost:5000')
-        
-        # Check if we're in production (Render) and force HTTPS
-        if 'onrender.com' in host or 'localhost' not in host:
-            websocket_url = f'wss://{host}/twilio'
-        else:
-            websocket_url = f'ws://{host}/twilio'
-            
-        logger.info(f"🔌 WebSocket URL: {websocket_url}")
-        
-        connect.stream(
-            url=websocket_url,
-            track='inbound_track',
-            name='voice_agent_stream'
-        )
-        
-        twiml_response = str(response)
-        logger.info(f"📞 Generated TwiML: {twiml_response}")
-        return Response(twiml_response, mimetype='text/xml')
+        twiml_response = stream_twiml(websocket_url)
+        logger.debug("📞 Generated TwiML: %s", twiml_response)
+        return Response(twiml_response, media_type='text/xml')
         
     except Exception as e:
         logger.error(f"❌ Error in voice webhook: {e}")
-        # Fallback response
-        response = VoiceResponse()
-        response.say("Sorry, there was an error. Please try again.")
-        return Response(str(response), mimetype='text/xml')
+        return Response(TWIML_ERROR, media_type='text/xml')
+
+class StreamClosed(Exception):
+    """Raised in a call's TaskGroup once one side of the bridge has finished"""
+
+async def run_until_closed(coro):
+    """Run a handler coroutine and close the call's TaskGroup when it returns"""
+    await coro
+    raise StreamClosed()
+
+async def buffer_twilio_messages(websocket, early_messages):
+    """Keep Twilio frames that arrive while Deepgram connects; return on hang-up"""
+    while True:
+        message = await websocket.receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+        early_messages.append(message['text'])
+
+async def acquire_deepgram(websocket, early_messages):
+    """Get a Deepgram session for a call, or None if Twilio hangs up first"""
+    # Starlette only notices a disconnect inside receive(), so keep reading
+    # Twilio while connecting instead of checking client_state
+    watcher = asyncio.create_task(buffer_twilio_messages(websocket, early_messages))
+    connecting = asyncio.create_task(deepgram_pool.acquire())
+    try:
+        await asyncio.wait((watcher, connecting), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Cancelling a finished task is a no-op. Wait for the watcher's receive()
+        # to unwind before handle_twilio_messages starts its own
+        watcher.cancel()
+        if not connecting.done():
+            connecting.cancel()
+        await asyncio.gather(watcher, connecting, return_exceptions=True)
+    if connecting.cancelled():
+        return None
+    return connecting.result()
 
-async def handle_twilio_connection(websocket, path):
+async def twilio_text_frames(websocket, early_messages):
+    """Yield the frames buffered during connect, then the live stream"""
+    for message in early_messages:
+        yield message
+    async for message in websocket.iter_text():
+        yield message
+
+async def handle_twilio_connection(websocket):
     """Handle WebSocket connection from Twilio (following video approach)"""
-    if path != '/twilio':
-        logger.warning(f"Unknown path: {path}")
-        return
-        
+    await websocket.accept()
     logger.info("🔌 New Twilio WebSocket connection")
-    connection_id = f"conn_{int(time.time() * 1000)}"
+    # The accepted socket already has TCP_NODELAY: asyncio and uvloop set it
+    # on every TCP transport
+    conn = None
+    deepgram_ws = None
+    
+    # Twilio audio and KeepAlives waiting for the Deepgram writer
+    inbound_audio = asyncio.Queue(maxsize=INBOUND_QUEUE_SIZE)
+    # Deepgram audio waiting to be batched to Twilio
+    outbound_audio = asyncio.Queue(maxsize=OUTBOUND_QUEUE_SIZE)
     
-    # Queues for communication between tasks
-    audio_queue = asyncio.Queue()
-    stream_sid_queue = asyncio.Queue()
+    # Twilio frames (connected, start, early media) read while Deepgram connects
+    early_messages = []
     
     try:
-        # Connect to Deepgram Voice Agent
-        async with create_deepgram_connection() as deepgram_ws:
-            logger.info("🎙️ Connected to Deepgram Voice Agent")
-            
-            # Store connection for cleanup
-            connection_manager.add_connection(connection_id, {
-                'twilio_ws': websocket,
-                'deepgram_ws': deepgram_ws,
-                'stream_sid': None,
-                'audio_buffer': bytearray()
-            })
-            
-            # Send Voice Agent configuration
-            config_message = get_deepgram_config()
-            await deepgram_ws.send(json.dumps(config_message))
-            logger.info("📋 Configuration sent to Deepgram Voice Agent")
-            
-            # Start tasks for handling messages (following video pattern)
-            tasks = [
-                asyncio.create_task(handle_twilio_messages(websocket, deepgram_ws, connection_id)),
-                asyncio.create_task(handle_deepgram_messages(deepgram_ws, websocket, connection_id)),
-                asyncio.create_task(send_keep_alive(deepgram_ws))
-            ]
-            
-            # Wait for any task to complete (usually means connection closed)
-            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        # Take a pre-connected Voice Agent session, or connect now if none is warm
+        deepgram_ws = await acquire_deepgram(websocket, early_messages)
+        if deepgram_ws is None:
+            logger.info("📴 Twilio hung up before Deepgram connected")
+            return
+        logger.info("🎙️ Connected to Deepgram Voice Agent")
+        
+        # Per-call state handed directly to the handler tasks; the manager
+        # tracks it for metrics and closes it if the call goes silent
+        conn = Connection(websocket, deepgram_ws)
+        connection_manager.add_connection(conn)
+        
+        # Send Voice Agent configuration
+        await deepgram_ws.send(DEEPGRAM_SETTINGS_MESSAGE)
+        logger.info("📋 Configuration sent to Deepgram Voice Agent")
+        
+        # Run the message handlers (following video pattern). Whichever
+        # finishes first (usually a closed connection) raises StreamClosed,
+        # and the TaskGroup cancels the others.
+        # No separate keep-alive task: Twilio streams audio for the whole
+        # call, and handle_twilio_messages sends KeepAlives while it
+        # withholds silence
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(run_until_closed(handle_twilio_messages(websocket, inbound_audio, conn, early_messages)))
+                tg.create_task(run_until_closed(send_deepgram_audio(deepgram_ws, inbound_audio)))
+                tg.create_task(run_until_closed(handle_deepgram_messages(deepgram_ws, websocket, conn, outbound_audio)))
+                tg.create_task(run_until_closed(send_twilio_audio(websocket, outbound_audio, conn)))
+        except* StreamClosed:
+            pass
             
-            # Cancel remaining tasks
-            for task in pending:
-                task.cancel()
-                
     except Exception as e:
         logger.error(f"❌ Error in Twilio connection handler: {e}")
     finally:
         # Cleanup
-        connection_manager.remove_connection(connection_id)
-        logger.info(f"🧹 Cleaned up connection {connection_id}")
+        if conn is not None:
+            connection_manager.remove_connection(conn)
+            logger.info(f"🧹 Cleaned up connection {conn.stream_sid}")
+        # Agent sessions are single-use; the pool refills with fresh ones
+        if deepgram_ws is not None:
+            await deepgram_ws.close()
+        # Send Twilio a proper close frame; if the handler just returns, uvicorn
+        # drops the TCP connection without one
+        if websocket.application_state is WebSocketState.CONNECTED:
+            with contextlib.suppress(WebSocketDisconnect, OSError):
+                await websocket.close()
 
-async def handle_twilio_messages(twilio_ws, deepgram_ws, connection_id):
+def on_twilio_start(data, conn):
+    """Handle Twilio's 'start' event"""
+    logger.info("🚀 Media stream started")
+    conn.start_stream(data.start.streamSid)
+
+def on_twilio_connected(data, conn):
+    """Handle Twilio's 'connected' event"""
+    logger.info("🔗 Twilio connected")
+
+# Handlers for the infrequent Twilio events; media and stop are handled inline
+TWILIO_EVENT_HANDLERS = {
+    "start": on_twilio_start,
+    "connected": on_twilio_connected,
+}
+
+async def handle_twilio_messages(twilio_ws, inbound_audio, conn, early_messages):
     """Handle messages from Twilio (following video approach)"""
     BUFFER_SIZE = 20 * 160  # 20 Twilio messages = 0.4 seconds of audio
-    audio_buffer = bytearray()
+    # Room for a full batch plus one more; beyond that the oldest audio is dropped
+    audio_buffer = AudioBuffer(2 * MAX_BUFFER_SIZE)
+    target_size = INBOUND_START_SIZE
+    silent_buffers = 0
+    last_keep_alive = 0.0
     
     try:
-        async for message in twilio_ws:
-            data = json.loads(message)
+        frames = twilio_text_frames(twilio_ws, early_messages) if early_messages else twilio_ws.iter_text()
+        async for message in frames:
+            data = twilio_decoder.decode(message)
             
-            if data["event"] == "start":
-                logger.info("🚀 Media stream started")
-                stream_sid = data["start"]["streamSid"]
-                conn = connection_manager.get_connection(connection_id)
-                if conn:
-                    conn['stream_sid'] = stream_sid
-                    
-            elif data["event"] == "connected":
-                logger.info("🔗 Twilio connected")
-                continue
-                
-            elif data["event"] == "media":
-                media = data["media"]
-                if media["track"] == "inbound":
+            # Media is ~50 events/s per call; everything else is rare
+            if data.event == "media":
+                media = data.media
+                if media.track == "inbound":
                     # Decode audio from Twilio
-                    chunk = base64.b64decode(media["payload"])
-                    audio_buffer.extend(chunk)
+                    chunk = b64decode(media.payload, validate=False)
+                    audio_buffer.write(chunk)
                     
                     # Send buffered audio to Deepgram when buffer is ready
-                    while len(audio_buffer) >= BUFFER_SIZE:
-                        audio_chunk = audio_buffer[:BUFFER_SIZE]
-                        await deepgram_ws.send(audio_chunk)
-                        audio_buffer = audio_buffer[BUFFER_SIZE:]
+                    while len(audio_buffer) >= target_size:
+                        audio_chunk = audio_buffer.read(target_size)
+                        now = conn.last_activity = time.monotonic()
+                        
+                        silent_buffers = silent_buffers + 1 if is_silent(audio_chunk) else 0
+                        if silent_buffers > SILENCE_HOLDOFF:
+                            # Long silence: stop streaming it, but keep the session alive
+                            if now - last_keep_alive >= KEEP_ALIVE_INTERVAL:
+                                put_drop_oldest(inbound_audio, KEEP_ALIVE_MESSAGE)
+                                last_keep_alive = now
+                            # Poll in small batches so resumed speech goes out promptly
+                            target_size = INBOUND_START_SIZE
+                            continue
+                            
+                        put_drop_oldest(inbound_audio, audio_chunk)
+                        target_size = min(target_size * 2, BUFFER_SIZE)
                         
-            elif data["event"] == "stop":
+            elif data.event == "stop":
                 logger.info("🛑 Media stream stopped")
                 break
                 
+            else:
+                handler = TWILIO_EVENT_HANDLERS.get(data.event)
+                if handler is not None:
+                    handler(data, conn)
+                
     except Exception as e:
         logger.error(f"❌ Error handling Twilio messages: {e}")
 
-async def handle_deepgram_messages(deepgram_ws, twilio_ws, connection_id):
+async def handle_deepgram_messages(deepgram_ws, twilio_ws, conn, outbound_audio):
     """Handle messages from Deepgram Voice Agent with function calling"""
     try:
         async for message in deepgram_ws:
-            if isinstance(message, str):
-                # Text message from Deepgram
-                data = json.loads(message)
-                logger.info(f"🤖 Deepgram message: {data.get('type', 'unknown')}")
+            # Audio frames vastly outnumber control messages: check for them first
+            if type(message) is bytes:
+                # Binary audio data from Deepgram, batched by send_twilio_audio.
+                # TTS arrives much faster than real time; every chunk is relayed,
+                # and only an oversized reply makes this reader wait
+                await outbound_audio.put(message)
+                continue
                 
-                # Handle function call requests
-                if data.get('type') == 'function_call_request':
-                    function_name = data.get('function_name')
-                    arguments = data.get('arguments', {})
-                    
-                    logger.info(f"🔧 Function call: {function_name} with args: {arguments}")
-                    
-                    # Execute the function
-                    result = execute_function_call(function_name, arguments)
-                    
-                    # Send function result back to Deepgram
-                    response = create_function_call_response(function_name, result)
-                    await deepgram_ws.send(json.dumps(response))
-                    logger.info(f"✅ Function result sent: {result}")
+            # Text message from Deepgram. orjson parses these short frames faster
+            # than any substring pre-check could rule them out
+            data = orjson.loads(message)
+            message_type = data.get('type', 'unknown')
+            logger.debug("🤖 Deepgram message: %s", message_type)
+            
+            # Handle function call requests
+            if message_type == 'function_call_request':
+                function_name = data.get('function_name')
+                arguments = data.get('arguments', {})
                 
-                # Handle user started speaking (barge-in)
-                elif data.get('type') == 'UserStartedSpeaking':
-                    conn = connection_manager.get_connection(connection_id)
-                    if conn and conn['stream_sid']:
-                        clear_message = {
-                            "event": "clear",
-                            "streamSid": conn['stream_sid']
-                        }
-                        await twilio_ws.send(json.dumps(clear_message))
-                        logger.info("🔄 Sent barge-in clear message to Twilio")
-                        
-            else:
-                # Binary audio data from Deepgram to send to Twilio
-                conn = connection_manager.get_connection(connection_id)
-                if conn and conn['stream_sid']:
-                    media_message = {
-                        "event": "media",
-                        "streamSid": conn['stream_sid'],
-                        "media": {
-                            "payload": base64.b64encode(message).decode("ascii")
-                        }
-                    }
-                    await twilio_ws.send(json.dumps(media_message))
+                logger.info("🔧 Function call: %s with args: %s", function_name, arguments)
+                
+                # Execute the function
+                result = execute_function_call(function_name, arguments)
+                
+                # Send function result back to Deepgram
+                response = create_function_call_response(function_name, result)
+                await deepgram_ws.send(orjson.dumps(response).decode())
+                logger.info("✅ Function result sent: %s", result)
+            
+            # Handle user started speaking (barge-in)
+            elif message_type == 'UserStartedSpeaking':
+                # Drop agent audio we have not forwarded yet along with Twilio's buffer
+                while not outbound_audio.empty():
+                    outbound_audio.get_nowait()
+                # Tells send_twilio_audio to drop whatever it is still holding
+                outbound_audio.put_nowait(None)
+                if conn.clear_message:
+                    await twilio_ws.send_text(conn.clear_message)
+                    logger.debug("🔄 Sent barge-in clear message to Twilio")
+                    
+            # Rejected Settings, function call faults and the like
+            elif message_type == 'Error':
+                logger.error("❌ Deepgram error %s: %s", data.get('code'), data.get('description'))
+            elif message_type == 'Warning':
+                logger.warning("⚠️ Deepgram warning %s: %s", data.get('code'), data.get('description'))
                     
     except Exception as e:
         logger.error(f"❌ Error handling Deepgram messages: {e}")
 
-async def send_keep_alive(deepgram_ws):
-    """Send keep-alive messages to maintain Deepgram connection"""
+async def send_deepgram_audio(deepgram_ws, inbound_audio):
+    """Forward queued Twilio audio and KeepAlives to Deepgram"""
     try:
         while True:
-            await asyncio.sleep(5)
-            keep_alive_message = {"type": "KeepAlive"}
-            await deepgram_ws.send(json.dumps(keep_alive_message))
-            logger.debug("💓 Keep alive sent")
+            batch = [await inbound_audio.get()]
+            while not inbound_audio.empty():
+                batch.append(inbound_audio.get_nowait())
+                
+            # Audio that backed up during a slow send goes out as one frame;
+            # KeepAlives stay separate text frames, in order
+            audio = []
+            audio_bytes = 0
+            for message in batch:
+                if type(message) is bytes:
+                    audio.append(message)
+                    audio_bytes += len(message)
+                    if audio_bytes < INBOUND_MAX_FRAME_BYTES:
+                        continue
+                    message = None
+                if audio:
+                    await deepgram_ws.send(b''.join(audio))
+                    audio = []
+                    audio_bytes = 0
+                if message is not None:
+                    await deepgram_ws.send(message)
+            if audio:
+                await deepgram_ws.send(b''.join(audio))
+            
     except Exception as e:
-        logger.error(f"❌ Error in keep-alive: {e}")
+        logger.error(f"❌ Error sending audio to Deepgram: {e}")
 
-def start_websocket_server():
-    """Start the WebSocket server for Twilio connections"""
-    port = int(os.getenv('PORT', 5000))
-    
-    # Create WebSocket server
-    import websockets
-    start_server = websockets.serve(
-        handle_twilio_connection,
-        "0.0.0.0",
-        port,
-        ping_interval=None,
-        ping_timeout=None
-    )
-    
-    logger.info(f"🔌 WebSocket server starting on port {port}")
-    
-    # Run the server
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(start_server)
-    loop.run_forever()
-
-def start_cleanup_task():
-    """Start background cleanup task"""
-    def cleanup_loop():
+async def send_twilio_audio(twilio_ws, outbound_audio, conn):
+    """Coalesce queued Deepgram audio into batched Twilio media events"""
+    last_sent = 0.0
+    try:
+        # Hold audio that arrives before Twilio's 'start' (e.g. the greeting)
+        # instead of dropping it; it waits in the queue until then
+        await conn.started.wait()
+        media_prefix = conn.media_prefix
+        
+        residual = b''  # Tail of the last batch, short of a whole frame
         while True:
-            try:
-                time.sleep(60)  # Run every minute
-                connection_manager.cleanup_inactive()
-                gc.collect()  # Force garbage collection
-            except Exception as e:
-                logger.error(f"❌ Cleanup task error: {e}")
-    
-    cleanup_thread = threading.Thread(target=cleanup_loop, daemon=True)
-    cleanup_thread.start()
-    logger.info("🧹 Started background cleanup task")
+            flush = False
+            if residual:
+                # Hold a partial frame for the next chunk, but send it as is
+                # once the response has gone quiet
+                try:
+                    chunk = await asyncio.wait_for(outbound_audio.get(), OUTBOUND_IDLE_GAP)
+                except TimeoutError:
+                    chunk = b''
+                    flush = True
+            else:
+                chunk = await outbound_audio.get()
+            if chunk is None:
+                # Barge-in: the held tail belongs to the interrupted response
+                residual = b''
+                continue
+            chunks = [residual, chunk]
+            batch_bytes = len(residual) + len(chunk)
+            
+            # Start of a new response goes out immediately; after that, give chunks
+            # arriving within the flush window a chance to share one frame
+            idle = time.monotonic() - last_sent > OUTBOUND_IDLE_GAP
+            if not idle and outbound_audio.qsize() < OUTBOUND_MAX_BATCH - 1:
+                await asyncio.sleep(OUTBOUND_FLUSH_INTERVAL)
+            while (batch_bytes < OUTBOUND_MAX_BATCH_BYTES and len(chunks) <= OUTBOUND_MAX_BATCH
+                   and not outbound_audio.empty()):
+                chunk = outbound_audio.get_nowait()
+                if chunk is None:
+                    # Barge-in while batching: everything gathered so far is stale
+                    chunks = []
+                    batch_bytes = 0
+                    continue
+                chunks.append(chunk)
+                batch_bytes += len(chunk)
+                
+            # Send whole frames only; the tail is prepended to the next batch
+            audio = b''.join(chunks)
+            aligned = len(audio) if flush else len(audio) - len(audio) % OUTBOUND_FRAME_BYTES
+            residual = audio[aligned:]
+            if not aligned:
+                continue
+                
+            # Encoded directly to str: Twilio only accepts text frames
+            payload = b64encode_as_string(audio[:aligned] if residual else audio)
+            await twilio_ws.send_text(''.join((media_prefix, payload, MEDIA_SUFFIX)))
+            last_sent = time.monotonic()
+                
+    except Exception as e:
+        logger.error(f"❌ Error sending audio to Twilio: {e}")
+
+# Single ASGI app: Twilio webhooks and the media stream share one event loop
+app = Starlette(lifespan=lifespan, routes=[
+    Route('/', health_check, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+    Route('/voice', voice_webhook, methods=['GET', 'POST']),
+    WebSocketRoute('/twilio', handle_twilio_connection),
+])
 
 if __name__ == '__main__':
     # Validate environment variables
@@ -634,20 +1141,30 @@ if __name__ == '__main__':
     
     logger.info("✅ All environment variables are set")
     
-    # Start background cleanup task
-    start_cleanup_task()
-    
     port = int(os.getenv('PORT', 5000))
     
-    # Start WebSocket server in a separate thread
-    websocket_thread = threading.Thread(target=start_websocket_server, daemon=True)
-    websocket_thread.start()
-    
-    # Start Flask app for HTTP endpoints
-    logger.info(f"🚀 Flask server starting on port {port}")
+    # Serve HTTP and WebSocket traffic from one uvicorn server (uvloop when available)
+    logger.info(f"🚀 Server starting on port {port}")
     logger.info(f"📞 Twilio webhook URL: https://twilio-deepgram-openai-voice.onrender.com/voice")
     logger.info(f"🔌 WebSocket URL: wss://twilio-deepgram-openai-voice.onrender.com/twilio")
     logger.info(f"📊 Metrics URL: https://twilio-deepgram-openai-voice.onrender.com/metrics")
     logger.info(f"🔧 Available functions: {list(FUNCTION_MAP.keys())}")
     
-    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
\ No newline at end of file
+    # Move everything built at import (config, templates, modules) out of the
+    # collector's reach so later GC passes only scan per-call objects
+    gc.freeze()
+    
+    # http defaults to 'auto', which picks the httptools parser when installed.
+    # websockets-sansio replaces the deprecated legacy 'websockets' server; it
+    # has no ws_max_queue, so inbound frames are bounded by handle_twilio_messages
+    uvicorn.run(
+        app,
+        host='0.0.0.0',
+        port=port,
+        loop='uvloop' if uvloop is not None else 'asyncio',
+        ws='websockets-sansio',
+        ws_max_size=WEBSOCKET_OPTIONS['max_size'],
+        ws_per_message_deflate=False,
+        ws_ping_interval=None,
+        ws_ping_timeout=None
+    )
\ No newline at end of file
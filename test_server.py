@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the audio relay between Deepgram and Twilio
+"""
+
+import asyncio
+import base64
+import orjson
+import server
+
+class FakeDeepgram:
+    """Deepgram socket whose messages are all buffered already, as in a TTS burst"""
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+
+class FakeTwilio:
+    """Twilio socket that records every frame sent to it"""
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+async def relay(chunks):
+    """Push chunks through the Deepgram reader and Twilio writer; return the audio Twilio got"""
+    twilio_ws = FakeTwilio()
+    conn = server.Connection(twilio_ws, None)
+    conn.start_stream('MZtest')
+    outbound_audio = asyncio.Queue(maxsize=server.OUTBOUND_QUEUE_SIZE)
+    writer = asyncio.create_task(server.send_twilio_audio(twilio_ws, outbound_audio, conn))
+    await server.handle_deepgram_messages(FakeDeepgram(chunks), twilio_ws, conn, outbound_audio)
+    # Let the writer drain the queue and flush any partial frame
+    while not outbound_audio.empty():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(3 * server.OUTBOUND_IDLE_GAP)
+    writer.cancel()
+    return b''.join(
+        base64.b64decode(orjson.loads(message)['media']['payload'])
+        for message in twilio_ws.sent
+    )
+
+def test_deepgram_burst_reaches_twilio_intact():
+    """A reply sent much faster than real time arrives whole and in order"""
+    for chunk_size in (250, 480, 3200):
+        chunks = [bytes([i]) * chunk_size for i in range(100)]
+        assert asyncio.run(relay(chunks)) == b''.join(chunks), chunk_size
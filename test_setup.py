@@ -138,7 +138,8 @@ def test_dependencies():
     print("\n📦 Testing Dependencies...")
     
     dependencies = [
-        'flask',
+        'starlette',
+        'uvicorn',
         'twilio', 
         'websockets',
         'dotenv',  # python-dotenv imports as 'dotenv'